@@ -1,17 +1,42 @@
 import argparse
+import atexit
+import gzip
 import itertools
-from collections import defaultdict
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from zoneinfo import ZoneInfo
 from pathlib import Path
 
-import requests
+import httpx
+import orjson
 from flask import Flask, request
+from flask.json.provider import JSONProvider
 import json
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    (de)serialize request and response bodies with orjson instead of stdlib json
+    """
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
+
+# log level can be set by env, i.e. LOG_LEVEL=DEBUG
+app.logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
 
 GSB_URL = "https://safebrowsing.googleapis.com/v4/threatMatches:find?key="
 THREAT_TYPES = [
@@ -20,6 +45,41 @@ THREAT_TYPES = [
 ]
 PLATFORM_TYPES = ["ANY_PLATFORM"]
 THREAT_ENTRY_TYPES = ["URL"]
+GSB_MAX_WORKERS = 8
+
+# threatMatches:find is a lookup, so retrying a failed POST is safe
+GSB_RETRIES = 3
+GSB_RETRY_BACKOFF = 0.2
+GSB_RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# set request url from env, i.e. when served by gunicorn where __main__ is not executed
+if os.environ.get("GSB_API_KEY"):
+    app.config["GSB_URL"] = f"{GSB_URL}{os.environ['GSB_API_KEY']}"
+
+CSV_PATH = Path("../data/evaluation/blacklist-evaluation-results.csv")
+
+# analyzed urls are buffered and appended to the csv-file at once,
+# after FLUSH_ROWS buffered rows or at latest every FLUSH_INTERVAL seconds
+FLUSH_ROWS = 5_000
+FLUSH_INTERVAL = 10
+BUFFER: list[pd.DataFrame] = []
+BUFFER_LOCK = threading.Lock()
+
+# appending to the csv-file is not atomic, so only one thread writes at a time
+CSV_LOCK = threading.Lock()
+
+# one http/2 client for all batches, concurrent batches are multiplexed as streams
+# over one keep-alive connection to the google safe browsing api (one tls handshake)
+CLIENT = httpx.Client(
+    transport=httpx.HTTPTransport(
+        http2=True,
+        retries=GSB_RETRIES,
+        limits=httpx.Limits(max_keepalive_connections=16, max_connections=32),
+    ),
+    headers={"Content-Type": "application/json"},
+    timeout=30.0,
+)
+atexit.register(CLIENT.close)
 
 
 def chunks(seq, size):
@@ -34,109 +94,153 @@ def chunks(seq, size):
         yield batch
 
 
+def request_gsb_batch(batch):
+    """
+    request one batch of urls in google safe browsing api blacklist
+    """
+    body = {
+        "client": {
+            "clientId": "Blacklist-Server",
+            "clientVersion": "1.0.0",
+        },
+        "threatInfo": {
+            "threatTypes": THREAT_TYPES,
+            "platformTypes": PLATFORM_TYPES,
+            "threatEntryTypes": THREAT_ENTRY_TYPES,
+            "threatEntries": [{"url": u} for u in batch],
+        },
+    }
+
+    # send batch request to google safe browsing api
+    batch_request_time = datetime.now(ZoneInfo("Europe/Berlin")).strftime("%d/%m/%y %H:%M:%S")
+    for attempt in range(GSB_RETRIES + 1):
+        r = CLIENT.post(app.config["GSB_URL"], content=orjson.dumps(body))
+        if r.status_code not in GSB_RETRY_STATUS:
+            break
+        if attempt == GSB_RETRIES:
+            r.raise_for_status()
+        time.sleep(GSB_RETRY_BACKOFF * 2 ** attempt)
+
+    return batch_request_time, orjson.loads(r.content)
+
+
 def request_gsb_api(url_list):
     """
     request for listed urls in google safe browsing api blacklist
     """
-    all_rows = []
-    total = 0
+    request_urls = []
+    match_json_objs = []
+    request_times = []
+    labels = []
 
     # send urls in batches. Max-number of urls per request is set to 500
-    for i, batch in enumerate(chunks(url_list, 500), start=1):
-        body = {
-            "client": {
-                "clientId": "Blacklist-Server",
-                "clientVersion": "1.0.0",
-            },
-            "threatInfo": {
-                "threatTypes": THREAT_TYPES,
-                "platformTypes": PLATFORM_TYPES,
-                "threatEntryTypes": THREAT_ENTRY_TYPES,
-                "threatEntries": [{"url": u} for u in batch],
-            },
-        }
-
-        # send batch request to google safe browsing api
-        batch_request_time = datetime.now(ZoneInfo("Europe/Berlin")).strftime("%d/%m/%y %H:%M:%S")
-        r = requests.post(app.config["GSB_URL"], json=body, timeout=30)
-        response = r.json()
-        total += len(batch)
-
-        # collect matches by url
-        by_url = defaultdict(list)
-        matches = response.get("matches", []) or []
-        for match in matches:
-            thread = match.get("threat") or {}
-            url = thread.get("url")
-            by_url[url].append(match)
-
-        # create a labeled output object for each input-url
-        for u in batch:
-            matches_for_u = by_url.get(u, [])
-
-            if matches_for_u:
-                # match found
-                # take only the first match if more than one are available
-                match_obj = matches_for_u[0]
-                match_json_obj = json.dumps(match_obj, ensure_ascii=False)
-                label = 0
-            else:
-                # no match found
-                match_obj = {}
-                match_json_obj = "{}"
-                label = 1
-
-            all_rows.append({
-                "request_url": u,
-                "match_obj": match_obj,
-                "match_json_obj": match_json_obj,
-                "request_time": batch_request_time,
-                "label": label,
-            })
+    batches = list(chunks(url_list, 500))
+
+    # send batches concurrently, results are returned in batch order
+    with ThreadPoolExecutor(max_workers=GSB_MAX_WORKERS) as ex:
+        results = ex.map(request_gsb_batch, batches)
+
+        for batch, (batch_request_time, response) in zip(batches, results):
+            # collect matches by url
+            # take only the first match if more than one are available
+            by_url = {}
+            matches = response.get("matches", []) or []
+            for match in matches:
+                thread = match.get("threat") or {}
+                by_url.setdefault(thread.get("url"), match)
+
+            # append labeled output columns for each input-url (match found = 0, no match found = 1)
+            request_urls.extend(batch)
+            match_json_objs.extend(
+                json.dumps(by_url[u], ensure_ascii=False) if u in by_url else "{}" for u in batch
+            )
+            request_times.extend([batch_request_time] * len(batch))
+            labels.extend(0 if u in by_url else 1 for u in batch)
 
     # return result as dataframe
-    df = pd.DataFrame(all_rows, columns=["request_url", "match_obj", "match_json_obj", "request_time", "label"])
+    df = pd.DataFrame({
+        "request_url": request_urls,
+        "match_json_obj": match_json_objs,
+        "request_time": request_times,
+        "label": labels,
+    })
     return df
 
 
 def write_analyzed_urls_to_csv(df_request, df_response):
     """
-    write the analyzed URLs with corresponding metadata into a CSV file
+    buffer the analyzed URLs with corresponding metadata to be written into a CSV file
     """
-    csv_path = Path("../data/evaluation/blacklist-evaluation-results.csv")
-
-    # prepare subsets
-    req = df_request.loc[:, ["url", "discover_time", "pulled_time"]].copy()
-    req["url"] = req["url"].astype(str).str.strip()
+    # metadata of requested urls by url
+    req_url = df_request["url"].astype(str).str.strip()
+    discover_times = dict(zip(req_url, df_request["discover_time"]))
+    pulled_times = dict(zip(req_url, df_request["pulled_time"]))
+
+    # define output structure, attach metadata to the response rows
+    url = df_response["request_url"].astype(str).str.strip()
+    out_df = pd.DataFrame({
+        "url": url,
+        "match_json_obj": df_response["match_json_obj"],
+        "discover_time": url.map(discover_times),
+        "pulled_time": url.map(pulled_times),
+        "request_time": df_response["request_time"],
+        "label": df_response["label"],
+    })
+
+    # make NaN pretty, metadata of clients as string so that any json value can be written by pyarrow
+    out_df = out_df.fillna("")
+    out_df["discover_time"] = out_df["discover_time"].astype(str)
+    out_df["pulled_time"] = out_df["pulled_time"].astype(str)
 
-    res = df_response.loc[:, ["request_url", "match_json_obj", "request_time", "label"]].copy()
-    res["url"] = res["request_url"].astype(str).str.strip()
+    # buffer rows, flush if buffer is full
+    with BUFFER_LOCK:
+        BUFFER.append(out_df)
+        buffered_rows = sum(len(df) for df in BUFFER)
+    if buffered_rows >= FLUSH_ROWS:
+        flush_buffer()
 
-    # merge
-    merged = res.merge(
-        req.loc[:, ["url", "discover_time", "pulled_time"]],
-        on="url",
-        how="left",
-    )
+    return out_df
 
-    # define output structure
-    out_cols = ["url", "match_json_obj", "discover_time", "pulled_time", "request_time", "label"]
-    out_df = merged.loc[:, out_cols].copy()
 
-    # make NaN pretty
-    out_df = out_df.fillna("")
+def flush_buffer():
+    """
+    append all buffered rows to the CSV file
+    """
+    with CSV_LOCK:
+        with BUFFER_LOCK:
+            frames = BUFFER[:]
+            BUFFER.clear()
+        if not frames:
+            return
+
+        # append to csv-file by pyarrow's csv writer
+        try:
+            table = pa.Table.from_pandas(pd.concat(frames, ignore_index=True), preserve_index=False)
+            write_header = not CSV_PATH.exists() or CSV_PATH.stat().st_size == 0
+            with CSV_PATH.open("ab") as f:
+                pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(include_header=write_header))
+        except Exception:
+            # keep rows for the next flush in front of rows buffered meanwhile
+            with BUFFER_LOCK:
+                BUFFER[:0] = frames
+            raise
+
+
+def flush_buffer_periodically():
+    """
+    flush buffer every FLUSH_INTERVAL seconds
+    """
+    while True:
+        time.sleep(FLUSH_INTERVAL)
+        try:
+            flush_buffer()
+        except Exception:
+            app.logger.exception("writing buffered urls into csv-file failed.")
 
-    # write to csv-file
-    write_header = not csv_path.exists() or csv_path.stat().st_size == 0
-    out_df.to_csv(
-        csv_path,
-        mode="a",
-        header=write_header,
-        index=False,
-        encoding="utf-8",
-    )
 
-    return out_df
+# flush in background and on shutdown
+threading.Thread(target=flush_buffer_periodically, daemon=True).start()
+atexit.register(flush_buffer)
 
 
 @app.post("/ingest-urls")
@@ -144,18 +248,23 @@ def ingest_urls() -> dict[str, bool]:
     """
     checks whether received URLs appear in the Google Safe Browsing API Blacklist
     """
-    data = request.get_json(force=True)
+    # body of pull-openphish-feed.py is gzip compressed
+    if request.content_encoding == "gzip":
+        data = orjson.loads(gzip.decompress(request.get_data()))
+    else:
+        data = request.get_json(force=True)
     req_df = pd.DataFrame(data, columns=["url", "discover_time", "pulled_time"])
     urls = [str(x.get("url")).strip() for x in data if isinstance(x, dict) and x.get("url")]
 
+    app.logger.debug("received %d items", len(data) if isinstance(data, list) else 1)
+
     # call gsb api and get response
-    request_time = datetime.now(ZoneInfo("Europe/Berlin")).strftime("%d/%m/%y %H:%M:%S")
-    print(f"\n[{request_time}]: send {len(urls)} urls to google safe browsing api blacklist.")
+    app.logger.info("send %d urls to google safe browsing api blacklist.", len(urls))
     res_df = request_gsb_api(urls)
 
     # write response into csv-file with metadata
     written_data = write_analyzed_urls_to_csv(req_df, res_df)
-    print(f"🧐 {len(written_data)} urls checked and results written into csv-file.")
+    app.logger.info("🧐 %d urls checked and results buffered for csv-file.", len(written_data))
 
     return {"ok": True}
 
@@ -168,7 +277,7 @@ if __name__ == "__main__":
 
     # add arguments
     parser.add_argument(
-        "--gsb-key", required=True, help="Google Safe Browsing API key"
+        "--gsb-key", default=os.environ.get("GSB_API_KEY"), help="Google Safe Browsing API key (default: env GSB_API_KEY)"
     )
     parser.add_argument(
         "--port", type=int, default=8080, help="Server port (default: 8080)"
@@ -180,7 +289,7 @@ if __name__ == "__main__":
     # get GSB-API-Key
     gsb_key = args.gsb_key
     if not gsb_key:
-        raise SystemExit("ERROR: Missing Google API-Key. Please set your key by using argument --gsb-key")
+        raise SystemExit("ERROR: Missing Google API-Key. Please set your key by using argument --gsb-key or env GSB_API_KEY")
 
     # set request url to app env
     app.config["GSB_URL"] = f"{GSB_URL}{gsb_key}"
@@ -2,6 +2,8 @@ import argparse
 from pathlib import Path
 
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import requests
 
 BLACKLIST_SERVER_URL = "http://127.0.0.1:8080/ingest-urls"
@@ -21,8 +23,18 @@ def read_feed_csv_as_dataframe(csv_path: Path) -> pd.DataFrame:
     read begin url csv-file into a pandas DataFrame to work with i
     """
     cols = ["url", "discover_time", "pulled_time"]
-    read_kwargs = dict(dtype=str, keep_default_na=False)
-    df = pd.read_csv(csv_path, usecols=cols, **read_kwargs)
+
+    # read only used columns as string by pyarrow's csv parser (empty cells stay "")
+    table = pacsv.read_csv(
+        csv_path,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=cols,
+            column_types={c: pa.string() for c in cols},
+            strings_can_be_null=False,
+        ),
+    )
+    df = table.to_pandas()
     return df
 
 
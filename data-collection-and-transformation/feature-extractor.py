@@ -1,14 +1,18 @@
 import argparse
-import ipaddress
+import multiprocessing as mp
+import os
 import re
-import urllib
+import socket
 
 import tldextract
 from pathlib import Path
-from typing import List
-from urllib.parse import urlparse
+from typing import List, Optional
+from urllib.parse import unquote, urlparse
 
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
 
 CREDENTIAL_KEYWORDS: list[str] = [
     "user", "username", "uid",
@@ -36,6 +40,62 @@ KNOWN_SHORTENING_SERVICES: list[str] = [
     "youtu.be", "lnkd.in", "wp.me",
     "amzn.to", "g.co"
 ]
+_SHORTENERS: frozenset[str] = frozenset(s.lower() for s in KNOWN_SHORTENING_SERVICES)
+
+# number of urls per chunk processed by one worker
+CHUNK_SIZE = 20_000
+
+# Public Suffix List (PSL) matcher, built once from the snapshot bundled with tldextract
+# (no download on startup, same PSL for every run)
+TLD_EXTRACT = tldextract.TLDExtract(suffix_list_urls=())
+
+def _keyword_pattern(keywords: List[str]) -> str:
+    """
+    builds a regex which matches any of the keywords from a prefix tree (trie) of the keywords,
+    so every position of an url is only compared against one branch per char instead of every keyword
+    """
+    trie: dict = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        # a keyword ends here, so the rest is optional
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+# precompiled patterns of the features
+_DOT_RE = re.compile(r"\.")
+_QUERY_PARAM_RE = re.compile(r"(?:^|&)\s*[^&\s]")
+_NETLOC_CREDENTIALS_RE = re.compile(r"^[^@]*:[^@]*@")
+_CREDENTIALS_RE = re.compile(_keyword_pattern([f"{keyword}=" for keyword in CREDENTIAL_KEYWORDS]))
+_SUSPICIOUS_RE = re.compile(_keyword_pattern(SUSPICIOUS_KEYWORDS))
+
+# char classes of the CharContinuationRate (0 = alpha, 1 = digit, 2 = special), non-ascii chars are special
+_CHAR_CLASS = np.full(129, 2, dtype=np.uint8)
+_CHAR_CLASS[np.frombuffer(b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ", dtype=np.uint8)] = 0
+_CHAR_CLASS[np.frombuffer(b"0123456789", dtype=np.uint8)] = 1
+
+# count classes of the char count features, every char belongs to exactly one class:
+# 0 = alphanumeric, 1 = ascii digit, 2 = other digit (i.e. superscripts),
+# 3 = '/', 4 = '.', 5 = '-', 6 = '@', 7 = other non-alphanumeric (incl. '_')
+# every class from 3 on is non-alphanumeric
+_COUNT_CLASSES = 8
+_COUNT_CLASS = np.array(
+    [0 if chr(c).isalnum() else 7 for c in range(128)],
+    dtype=np.uint8,
+)
+_COUNT_CLASS[np.frombuffer(b"0123456789", dtype=np.uint8)] = 1
+_COUNT_CLASS[np.frombuffer(b"/.-@", dtype=np.uint8)] = [3, 4, 5, 6]
 
 
 def read_urls_from_csv(csv_path: Path) -> List[str]:
@@ -45,351 +105,406 @@ def read_urls_from_csv(csv_path: Path) -> List[str]:
     if not csv_path.is_file():
         raise FileNotFoundError(f"File {csv_path} does not exist")
 
-    # read csv
-    df = pd.read_csv(csv_path, dtype=str)
-
-    # find url column
-    candidates = [c for c in df.columns if c.lower() == "url"]
+    # find url column in header
+    header = pd.read_csv(csv_path, nrows=0).columns
+    candidates = [c for c in header if c.lower() == "url"]
     if not candidates:
         raise KeyError(f"No urls found in {csv_path}")
 
-    # return list of urls
+    # read only the url column as string by pyarrow's csv parser
     url_col = candidates[0]
-    series = df[url_col].dropna().astype(str).map(str.strip)
+    table = pacsv.read_csv(
+        csv_path,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=[url_col],
+            column_types={url_col: pa.string()},
+            strings_can_be_null=True,
+        ),
+    )
+
+    # return list of urls
+    series = table.column(url_col).to_pandas().dropna().astype(str).map(str.strip)
     return [u for u in series if u != ""]
 
 
+def _count_class(char: str) -> int:
+    """
+    returns count class of a non-ascii char
+    """
+    # same semantics as str.isdigit and the unicode aware [\W_] of re
+    if char.isdigit():
+        return 2
+    return 0 if char.isalnum() else 7
+
+
+def _char_counts(url: pd.Series) -> pd.DataFrame:
+    """
+    returns the char counts of every url, which are needed by the count features.
+
+    every char of all urls is mapped to its count class in a single pass over one concatenated buffer,
+    all urls are then counted at once by a histogram of (url, class).
+    """
+    lengths = url.str.len().to_numpy(dtype=np.int64)
+    buf = np.frombuffer("".join(url).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+
+    # classify ascii chars by a lookup table and every distinct non-ascii char only once
+    kind = np.empty(len(buf), dtype=np.int64)
+    is_ascii = buf < 128
+    kind[is_ascii] = _COUNT_CLASS[buf[is_ascii]]
+    if not is_ascii.all():
+        chars, inverse = np.unique(buf[~is_ascii], return_inverse=True)
+        kind[~is_ascii] = np.array([_count_class(chr(c)) for c in chars], dtype=np.int64)[inverse]
+
+    # 2d histogram, one row per url and one column per count class
+    owner = np.repeat(np.arange(len(lengths)), lengths)
+    hist = np.bincount(
+        owner * _COUNT_CLASSES + kind,
+        minlength=len(lengths) * _COUNT_CLASSES,
+    ).reshape(len(lengths), _COUNT_CLASSES)
+
+    return pd.DataFrame(
+        {
+            "ascii_digit_count": hist[:, 1],
+            "digit_count": hist[:, 1] + hist[:, 2],
+            "slash_count": hist[:, 3],
+            "dot_count": hist[:, 4],
+            "dash_count": hist[:, 5],
+            "at_count": hist[:, 6],
+            "special_char_count": hist[:, 3:].sum(axis=1),
+        },
+        index=url.index,
+    )
+
+
+def parse_urls(urls: List[str]) -> pd.DataFrame:
+    """
+    parses every url exactly once and stores its parts in columns, which are reused by all features
+    """
+    # strip and decode every url only once, keep python str semantics (unicode aware re and str methods)
+    url = pd.Series(urls, dtype=object).str.strip().map(unquote).astype(object)
+    df = pd.DataFrame({"url": url, "url_lower": url.str.lower()}, dtype=object)
+
+    # split url into its parts
+    parsed = df["url"].map(urlparse)
+    cols = ["scheme", "netloc", "path", "query", "fragment"]
+    df[cols] = pd.DataFrame(
+        [(p.scheme, p.netloc, p.path, p.query, p.fragment) for p in parsed],
+        index=df.index,
+        columns=cols,
+        dtype=object,
+    )
+
+    # split domain by Public Suffix List (PSL)
+    extracted = df["url"].map(TLD_EXTRACT)
+    cols = ["subdomain", "domain", "suffix"]
+    df[cols] = pd.DataFrame(
+        [(e.subdomain, e.domain, e.suffix) for e in extracted],
+        index=df.index,
+        columns=cols,
+        dtype=object,
+    )
+
+    # count chars of every url once, which are shared by the count features
+    return pd.concat([df, _char_counts(df["url"])], axis=1)
+
+
 # Feature 1
-def url_char_count(url: str) -> int:
+def url_char_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of characters in an url
     """
-    return len(url)
+    return df["url"].str.len()
 
 
 # Feature 2
-def url_slash_count(url: str) -> int:
+def url_slash_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of slashes in an url
     """
-    return url.count("/")
+    return df["slash_count"]
 
 
 # Feature 3
-def check_https(url: str) -> int:
+def check_https(df: pd.DataFrame) -> pd.Series:
     """
     checks if an url use https
     """
-    scheme = urlparse(url).scheme.lower()
-    if scheme == "https":
-        return 1
-    else:
-        return 0
+    return (df["scheme"].str.lower() == "https").astype(int)
 
 
 # Feature 4
-def http_occurrence_count(url: str) -> int:
+def http_occurrence_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of 'http://' occurrences in an url
     """
-    haystack = url.lower()
-    needle = "http://"
-    return haystack.count(needle)
+    return df["url_lower"].str.count("http://")
 
 
 # Feature 5
-def https_occurrence_count(url: str) -> int:
+def https_occurrence_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of 'https://' occurrences in an url
     """
-    haystack = url.lower()
-    needle = "https://"
-    return haystack.count(needle)
+    return df["url_lower"].str.count("https://")
 
 
 # Feature 6
-def url_dot_count(url: str) -> int:
+def url_dot_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of '.' occurrences in an url
     """
-    return url.count(".")
+    return df["dot_count"]
 
 
-# Feature 7
-def check_ip(url: str) -> int:
+def _is_ip_address(netloc: str) -> int:
     """
-    checks if url refers to an ip address rather than a domain name
+    checks if host of netloc is an ip
     """
-    # extract domain from url
-    parts = urlparse(url)
-    domain = parts.netloc
+    # strip port and brackets of ipv6 (i.e. '1.2.3.4:80', '[::1]:8080')
+    host = netloc
+    if host.startswith("["):
+        host = host[1:].split("]", 1)[0]
+    elif host.count(":") == 1:
+        host = host.split(":", 1)[0]
 
-    if parts.scheme is None:
-        # no scheme available, try again with default http scheme.
-        parts = urlparse("http://" + url)
-        domain = parts.netloc
+    # fast reject: ipv4 starts with a digit, ipv6 contains ':'
+    if not (host[:1].isdigit() or ":" in host):
+        return 0
 
-    # check if domain is an ip
-    try:
-        ipaddress.ip_address(domain)
-        return 1
-    except ValueError:
+    # ipv6 may have a scope zone (i.e. 'fe80::1%eth0'), which inet_pton rejects
+    ipv6, sep, zone = host.partition("%")
+    if sep and (not zone or "%" in zone):
         return 0
 
+    for family, addr in ((socket.AF_INET, host), (socket.AF_INET6, ipv6)):
+        try:
+            socket.inet_pton(family, addr)
+            return 1
+        except (OSError, ValueError):
+            pass
+
+    return 0
+
+
+# Feature 7
+def check_ip(df: pd.DataFrame) -> pd.Series:
+    """
+    checks if url refers to an ip address rather than a domain name
+    """
+    return df["netloc"].map(_is_ip_address)
+
 
 # Feature 8
-def url_digit_count(url: str) -> int:
+def url_digit_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of digits in an url
     """
-    return len(re.findall(r"[0-9]", url))
+    return df["ascii_digit_count"]
 
 
 # Feature 9
-def url_dash_count(url: str) -> int:
+def url_dash_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of dash characters in an url
     """
-    return url.count("-")
+    return df["dash_count"]
 
 
 # Feature 10
-def check_at_symbol(url: str) -> int:
+def check_at_symbol(df: pd.DataFrame) -> pd.Series:
     """
     check if '@' occurs in an url
     0 = yes
     1 = no
     """
-    if "@" in url:
-        return 1
-    else:
-        return 0
+    return (df["at_count"] > 0).astype(int)
 
 
 # Feature 11
-def url_double_slash_count(url: str) -> int:
+def url_double_slash_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of double slashes '//' in an url
     """
-    return url.count("//")
+    return df["url"].str.count("//")
 
 
 # Feature 12
-def subdomain_count(url: str) -> int:
+def subdomain_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of subdomains in an url
     """
-    subdomain = tldextract.extract(url).subdomain
-
-    if len(subdomain) > 0:
-        return (subdomain.strip()).count(".") + 1
-    else:
-        return 0
+    subdomain = df["subdomain"]
+    return (subdomain.str.strip().str.count(_DOT_RE) + 1).where(subdomain.str.len() > 0, 0)
 
 
 # Feature 13
-def domain_dash_count(url: str) -> int:
+def domain_dash_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of dash chars in domain
     """
-    extr = tldextract.extract(url)
-    full_domain = ".".join(
-        part for part in [
-            extr.subdomain,
-            extr.domain,
-            extr.suffix
-        ] if part)
-
-    return (full_domain.strip()).count("-")
+    return (
+        df["subdomain"].str.count("-")
+        + df["domain"].str.count("-")
+        + df["suffix"].str.count("-")
+    )
 
 
 # Feature 14
-def check_query(url: str) -> int:
+def check_query(df: pd.DataFrame) -> pd.Series:
     """
     checks if the url contains a query parameter (i.e. '?password=')
     """
-    parsed_url = urlparse(url)
-
-    if parsed_url.query:
-        return 1
-    else:
-        return 0
+    return (df["query"] != "").astype(int)
 
 
 # Feature 15
-def calculate_ratio_of_digits(url: str) -> float:
+def calculate_ratio_of_digits(df: pd.DataFrame) -> pd.Series:
     """
     calculates ratio of digits in an url
     """
-    full_length = len(url)
-
-    if full_length == 0:
-        return 0.0
+    full_length = df["url"].str.len()
 
     # count digits
-    numer_of_digits = sum(char.isdigit() for char in url.strip())
+    # str.isdigit also counts i.e. superscripts, which \d does not match
+    number_of_digits = df["digit_count"]
 
     # calc ratio
-    ratio = numer_of_digits / full_length
-    return ratio
+    return (number_of_digits / full_length).where(full_length > 0, 0.0)
 
 
 # Feature 16
-def check_rare_top_level_domain(url: str) -> int:
+def check_rare_top_level_domain(df: pd.DataFrame) -> pd.Series:
     """
     checks if the url has a rare top level domain by checking against from Public Suffix List (PSL)
     """
-    extr = tldextract.extract(url)
-
-    if extr.suffix:
-        # known tld
-        return 0
-    else:
-        # unknown tld
-        return 1
+    # known tld = 0, unknown tld = 1
+    return (df["suffix"] == "").astype(int)
 
 
 # Feature 17
-def url_non_alphanumeric_char_count(url: str) -> int:
+def url_non_alphanumeric_char_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of non-alphanumeric characters in an url
     """
-    not_alnum = 0
-
-    for char in url:
-        if not char.isalnum():
-            not_alnum += 1
-
-    return not_alnum
+    return df["special_char_count"]
 
 
 # Feature 18
-def calculate_ratio_of_non_alphanumeric_chars(url: str) -> float:
+def calculate_ratio_of_non_alphanumeric_chars(df: pd.DataFrame) -> pd.Series:
     """
     calculates ratio of special chars in an url
     """
-    full_length = len(url)
-
-    if full_length == 0:
-        return 0.0
+    full_length = df["url"].str.len()
 
     # count non-alphanumeric chars
-    not_alnum = sum(not char.isalnum() for char in url)
+    not_alnum = url_non_alphanumeric_char_count(df)
 
     # calc ratio
-    ratio = not_alnum / full_length
-    return ratio
+    return (not_alnum / full_length).where(full_length > 0, 0.0)
 
 
 # Feature 19
-def url_subdirectory_count(url: str) -> int:
+def url_subdirectory_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of subdirectories in an url
     """
-    parsed = urlparse(url)
-    path = parsed.path
-    clean_path = path.strip('/')
-
-    if not clean_path:
-        return 0
-
-    segments = clean_path.split('/')
-
-    return len(segments)
+    clean_path = df["path"].str.strip("/")
+    return (clean_path.str.count("/") + 1).where(clean_path != "", 0)
 
 
 # Feature 20
-def url_query_param_count(url: str) -> int:
+def url_query_param_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of queries in an url
     """
-    parsed = urlparse(url)
-    query = parsed.query
-
-    if not query:
-        return 0
-
-    segments = query.split('&')
-
-    count = 0
-    for segment in segments:
-        if segment.strip():
-            count += 1
-
-    return count
+    # count '&' separated segments which are not blank
+    return df["query"].str.count(_QUERY_PARAM_RE)
 
 
 # Feature 21
-def domain_tld_length(url: str) -> int:
+def domain_tld_length(df: pd.DataFrame) -> pd.Series:
     """
     returns length of known Top Level Domain in an url
     """
-    tld = tldextract.extract(url).suffix
-
-    return len(tld)
+    return df["suffix"].str.len()
 
 
 # Feature 22
-def check_anchor(url: str) -> int:
+def check_anchor(df: pd.DataFrame) -> pd.Series:
     """
     checks if the url contains a fragment identifier '#'
     """
-    fragment = urlparse(url).fragment
-
-    if fragment != "":
-        return 1
-    else:
-        return 0
+    return (df["fragment"] != "").astype(int)
 
 
 # Feature 23
-def check_credentials(url: str) -> int:
+def check_credentials(df: pd.DataFrame) -> pd.Series:
     """
     checks if the url contains identifier for credentials
     """
-    parsed = urlparse(url)
-
     # 1. check for credentials in netloc part (i.e. user:pass@domain.com)
-    netloc = parsed.netloc
-    if '@' in netloc and ':' in netloc.split('@')[0]:
-        return 1
+    in_netloc = df["netloc"].str.contains(_NETLOC_CREDENTIALS_RE)
 
     # 2. check for credentials in query-strings
-    query = parsed.query
-    if query != "":
-        qs_lower = query.lower()
+    in_query = df["query"].str.lower().str.contains(_CREDENTIALS_RE)
 
-        for keyword in CREDENTIAL_KEYWORDS:
-            if f"{keyword}=" in qs_lower:
-                return 1
-
-    return 0
+    return (in_netloc | in_query).astype(int)
 
 
 # Feature 24
-def check_known_shortening_service(url: str) -> int:
+def check_known_shortening_service(df: pd.DataFrame) -> pd.Series:
     """
     checks if the url is from a well-known shortening service
     """
-    netloc = urlparse(url).netloc
-
-    if netloc in KNOWN_SHORTENING_SERVICES:
-        return 1
-    else:
-        return 0
+    # compare the host only (i.e. 'BIT.LY:443' -> 'bit.ly')
+    host = df["netloc"].str.lower().str.split(":", n=1).str[0]
+    return host.isin(_SHORTENERS).astype(int)
 
 
 # Feature 25
-def domain_char_count(url: str) -> int:
+def domain_char_count(df: pd.DataFrame) -> pd.Series:
     """
     returns number of characters in a domain
     """
-    netloc = urlparse(url).netloc
-    return len(netloc.strip())
+    return df["netloc"].str.strip().str.len()
+
+
+def _longest_runs(url: pd.Series) -> np.ndarray:
+    """
+    returns the length of the longest alphabetic, digit and special char sequence of every url.
+
+    all urls are scanned in a single pass over one concatenated buffer,
+    the offsets of the urls in that buffer are used to split the sequences by url.
+    """
+    lengths = url.str.len().to_numpy(dtype=np.int64)
+    longest = np.zeros((len(lengths), 3), dtype=np.int64)
+    if lengths.sum() == 0:
+        return longest
+
+    # classify every char by a lookup table (0 = alpha, 1 = digit, 2 = special)
+    buf = np.frombuffer("".join(url).encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    kind = _CHAR_CLASS[np.minimum(buf, len(_CHAR_CLASS) - 1)]
+
+    # a sequence starts where the char class changes or a new url begins
+    starts = lengths.cumsum() - lengths
+    is_start = np.empty(len(kind), dtype=bool)
+    is_start[0] = True
+    np.not_equal(kind[1:], kind[:-1], out=is_start[1:])
+    is_start[starts[lengths > 0]] = True
+
+    # length, class and url of each sequence
+    seq_start = np.flatnonzero(is_start)
+    seq_len = np.diff(seq_start, append=len(kind))
+    seq_kind = kind[seq_start]
+    seq_url = np.searchsorted(starts, seq_start, side="right") - 1
+
+    np.maximum.at(longest, (seq_url, seq_kind), seq_len)
+    return longest
 
 
 # Feature 26
-def calculate_char_continuation_rate(url: str) -> float:
+def calculate_char_continuation_rate(df: pd.DataFrame) -> pd.Series:
     """
     Calculates the CharContinuationRate of an URL.
 
@@ -401,52 +516,24 @@ def calculate_char_continuation_rate(url: str) -> float:
 
     This total length is divided by the overall length of the URL.
     """
-    if not url:
-        return 0.0
-
-    # Helper function to find the length of the longest sequence for a given pattern
-    def get_longest_sequence_length(pattern: str, text: str) -> int:
-        sequences = re.findall(pattern, text)
-        return len(max(sequences, key=len)) if sequences else 0
-
-    # 1. Longest Alphabetic sequence length
-    # Pattern: one or more letters [a-zA-Z]+
-    longest_alphabet_len = get_longest_sequence_length(r'[a-zA-Z]+', url)
-
-    # 2. Longest Digit sequence length
-    # Pattern: one or more digits [0-9]+
-    longest_digit_len = get_longest_sequence_length(r'[0-9]+', url)
-
-    # 3. Longest Special Character sequence length
-    # Pattern: one or more non-alphanumeric characters [^a-zA-Z0-9]+
-    # This includes '.', '-', '/', ':', etc.
-    longest_special_char_len = get_longest_sequence_length(r'[^a-zA-Z0-9]+', url)
+    total_longest_length = pd.Series(_longest_runs(df["url"]).sum(axis=1), index=df.index)
+    total_url_length = df["url"].str.len()
 
-    # 4. Total length of the longest sequences
-    total_longest_length = longest_alphabet_len + longest_digit_len + longest_special_char_len
-
-    # 5. Total length of the URL
-    total_url_length = len(url)
-
-    # 6. Calculate the Char Continuation Rate
-    char_continuation_rate = total_longest_length / total_url_length
-
-    return char_continuation_rate
+    return (total_longest_length / total_url_length).where(total_url_length > 0, 0.0)
 
 
 # Feature 27
-def check_suspicious_keywords(url: str) -> int:
+def check_suspicious_keywords(df: pd.DataFrame) -> pd.Series:
     """
     checks if the url contains suspicious keywords from list above
     """
-    for keyword in SUSPICIOUS_KEYWORDS:
-        if keyword in url:
-            return 1
-
-    return 0
+    return df["url"].str.contains(_SUSPICIOUS_RE).astype(int)
 
 
-def extract_features(urls: List[str], label: int, csv_path: Path) -> pd.DataFrame:
+def compute_features(urls: List[str], label: int) -> pd.DataFrame:
+    """
+    computes all features of the given urls
+    """
     feature_funcs = {
         "url_length": url_char_count,
         "number_of_slashes": url_slash_count,
@@ -477,16 +564,41 @@ def extract_features(urls: List[str], label: int, csv_path: Path) -> pd.DataFram
         "suspicious_keywords": check_suspicious_keywords,
     }
 
-    records = [
-        {
-            "url": urllib.parse.unquote(u.strip()),
-            "label": label,
-            **{col: fn(urllib.parse.unquote(u.strip())) for col,
-            fn in feature_funcs.items()}}
-        for u in urls
-    ]
-
-    df = pd.DataFrame.from_records(records, columns=["url", "label", *feature_funcs.keys()])
+    # features only depend on the url itself, so every distinct url is computed once
+    codes, unique_urls = pd.factorize(pd.Series(urls, dtype=object))
+
+    # parse urls once, every feature works on the parsed columns
+    parts = parse_urls(list(unique_urls))
+
+    df = pd.concat(
+        [
+            parts["url"],
+            pd.Series(label, index=parts.index, name="label"),
+            *(fn(parts).rename(col) for col, fn in feature_funcs.items()),
+        ],
+        axis=1,
+    )
+
+    # map features back to the order (and duplicates) of the input urls
+    return df.take(codes).reset_index(drop=True)
+
+
+def extract_features(urls: List[str], label: int, csv_path: Path, workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    extracts features of urls in chunks on multiple cores and writes them to the csv-file at once
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = [urls[i:i + CHUNK_SIZE] for i in range(0, len(urls), CHUNK_SIZE)] or [urls]
+
+    if workers == 1 or len(chunks) == 1:
+        frames = [compute_features(chunk, label) for chunk in chunks]
+    else:
+        # chunks are returned in input order
+        with mp.Pool(min(workers, len(chunks))) as pool:
+            frames = pool.starmap(compute_features, [(chunk, label) for chunk in chunks])
+
+    df = pd.concat(frames, ignore_index=True)
+
     write_header = not csv_path.exists() or csv_path.stat().st_size == 0
     df.to_csv(
         csv_path,
@@ -522,6 +634,12 @@ if __name__ == "__main__":
         required=True,
         help="Path to output CSV-File with extracted features"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Number of processes to extract features with (default: number of cpu cores)"
+    )
 
     # parse arguments
     args = parser.parse_args()
@@ -533,6 +651,6 @@ if __name__ == "__main__":
 
     # set label and start feature extraction
     csv_path = Path('../data/features.csv')
-    extract_features(urls, int(args.label), Path(args.outputFile))
+    extract_features(urls, int(args.label), Path(args.outputFile), args.workers)
 
     print(f"\n✏️ Features of {len(urls)} urls were extracted and written to {csv_path}")
\ No newline at end of file
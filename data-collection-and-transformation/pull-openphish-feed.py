@@ -1,21 +1,70 @@
 import argparse
+import atexit
+import gzip
+import io
+import signal
 import subprocess
 import sys
 import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 BERLIN = ZoneInfo("Europe/Berlin")
 FMT_OUT = "%d/%m/%y %H:%M:%S"
 BLACKLIST_SERVER_URL = "http://127.0.0.1:8080/ingest-urls"
 
+# reuse one keep-alive connection to the blacklist server (and feed url) for all pulls.
+# POST is not retried on a status (ingesting twice would write results twice), only failed connects are.
+SESSION = requests.Session()
+ADAPTER = HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=4,
+    max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504]),
+)
+SESSION.mount("http://", ADAPTER)
+SESSION.mount("https://", ADAPTER)
+
+# posts new entries to the blacklist server in the background, so the next pull does not wait for it.
+# one worker keeps the posts in order of the pulls.
+POST_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="blacklist-post")
+
+# column order of openphish-feed.csv, read from its header once per run
+OUTPUT_COLS: Optional[list[str]] = None
+
+# parquet dataset of new entries (--output-format parquet), every watcher run writes one part file into it.
+# the writer is kept open across pulls, its footer is written when the watcher exits.
+PARQUET_DIR = Path("openphish-feed.parquet")
+PARQUET_WRITER: Optional[pq.ParquetWriter] = None
+
+# validators of the last downloaded feed.csv, to only download it again if it has been modified
+FEED_VALIDATORS: dict[str, Optional[str]] = {"ETag": None, "Last-Modified": None}
+
+# columns of the openphish feed with few distinct values, which are dictionary encoded (categorical)
+DICTIONARY_COLS = [
+    "brand", "asn", "asn_name",
+    "country_code", "country_name", "tld",
+    "ssl_cert_issued_by", "is_spear", "sector"
+]
+
+# separates the values of a row in its row key (unit separator, does not occur in the feed)
+ROW_KEY_SEP = "\x1f"
+
 
 def utc_to_berlin(ts_str: str) -> str:
     """
@@ -28,6 +77,19 @@ def utc_to_berlin(ts_str: str) -> str:
     return dt_utc.astimezone(BERLIN).strftime(FMT_OUT)
 
 
+def utc_series_to_berlin(ts: pd.Series) -> pd.Series:
+    """
+    convert utc timestamps of a column to berlin timestamps at once (same as utc_to_berlin per value)
+    """
+    s = ts.astype(str).str.strip().str.removesuffix("UTC").str.strip()
+    dt_utc = pd.to_datetime(s, format="%d-%m-%Y %H:%M:%S", utc=True)
+
+    # format berlin wall clock time by pyarrow, Series.dt.strftime formats every value in python
+    dt_berlin = dt_utc.dt.tz_convert(BERLIN).dt.tz_localize(None)
+    formatted = pc.strftime(pa.array(dt_berlin).cast(pa.timestamp("s")), format=FMT_OUT)
+    return pd.Series(formatted, index=ts.index, dtype=pd.ArrowDtype(pa.string()))
+
+
 def run(cmd: list[str], cwd: Optional[str] = None) -> None:
     """
     execute shell command
@@ -48,6 +110,18 @@ def git_pull(local_dir: Path) -> None:
     run(["git", "-C", str(local_dir), "pull", "--ff-only"])
 
 
+def feed_blob_sha(local_dir: Path) -> Optional[str]:
+    """
+    return git object id of feed.csv in HEAD, None if it is not part of HEAD
+    """
+    completed = subprocess.run(
+        ["git", "-C", str(local_dir), "rev-parse", "HEAD:feed.csv"], capture_output=True, text=True, check=False
+    )
+    if completed.returncode != 0:
+        return None
+    return completed.stdout.strip()
+
+
 def ensure_repo_cloned(repo_url: str, local_dir: Path) -> None:
     """
     if local_dir does not exist, create folder and clone repository.
@@ -60,38 +134,115 @@ def ensure_repo_cloned(repo_url: str, local_dir: Path) -> None:
     run(cmd)
 
 
-def read_feed_csv_as_dataframe(csv_path: Path) -> pd.DataFrame:
+def fetch_feed_csv(feed_url: str) -> Optional[bytes]:
     """
-    read feed csv-file into a pandas DataFrame to work with it
+    download feed.csv by a conditional request, returns None if it has not been modified since the last download
     """
-    df = pd.read_csv(csv_path, dtype=str, keep_default_na=False)
+    headers = {}
+    if FEED_VALIDATORS["ETag"]:
+        headers["If-None-Match"] = FEED_VALIDATORS["ETag"]
+    if FEED_VALIDATORS["Last-Modified"]:
+        headers["If-Modified-Since"] = FEED_VALIDATORS["Last-Modified"]
+
+    # not modified feed is answered by an empty 304 response
+    r = SESSION.get(feed_url, headers=headers, timeout=(3, 30))
+    if r.status_code == 304:
+        return None
+    r.raise_for_status()
+
+    FEED_VALIDATORS["ETag"] = r.headers.get("ETag")
+    FEED_VALIDATORS["Last-Modified"] = r.headers.get("Last-Modified")
+    return r.content
+
+
+def read_feed_csv_as_dataframe(feed_csv: Union[Path, bytes]) -> pd.DataFrame:
+    """
+    read feed csv-file (or downloaded content of it) into a pandas DataFrame to work with it
+    """
+    # downloaded content is parsed from memory
+    if isinstance(feed_csv, bytes):
+        cols = pd.read_csv(io.BytesIO(feed_csv), nrows=0).columns
+        feed_csv = pa.BufferReader(feed_csv)
+    else:
+        cols = pd.read_csv(feed_csv, nrows=0).columns
+
+    # read all columns as string by pyarrow's multi-threaded csv parser (no type inference, empty cells stay "")
+    table = pacsv.read_csv(
+        feed_csv,
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            column_types={c: pa.string() for c in cols},
+            strings_can_be_null=False,
+        ),
+    )
+
+    # normalize strings once while reading (same whitespace as str.strip),
+    # repetitive columns are dictionary encoded afterwards, each distinct value is stored once
+    for i, name in enumerate(table.column_names):
+        col = pc.utf8_trim_whitespace(table.column(i))
+        if name in DICTIONARY_COLS:
+            col = pc.dictionary_encode(col)
+        table = table.set_column(i, name, col)
+
+    # keep strings in arrow memory instead of converting every cell to a python object,
+    # dictionary encoded columns become categorical
+    df = table.to_pandas(types_mapper=lambda t: None if pa.types.is_dictionary(t) else pd.ArrowDtype(t))
     return df
 
 
-def get_new_entries(prev_df: pd.DataFrame, act_df: pd.DataFrame) -> pd.DataFrame:
+def row_keys(df: pd.DataFrame, cols: list[str]) -> pa.Array:
     """
-    return new entries from act_df that pev_df not contains
+    return one key string per row, which is joined from the values of cols
     """
-    # align cols
-    cols = list(prev_df.columns)
-    act_aligned = act_df[cols].copy()
-    prev_aligned = prev_df[cols].copy()
+    # join all cols at once by pyarrow, arrow backed cols are passed without conversion
+    # and categorical cols are decoded by arrow
+    arrays = [pa.array(df[c]).cast(pa.large_string()) for c in cols]
+    return pc.binary_join_element_wise(*arrays, pa.scalar(ROW_KEY_SEP, type=pa.large_string()))
 
-    # normalize strings
-    for df in (act_aligned, prev_aligned):
-        obj_cols = df.select_dtypes(include=["object"]).columns
-        for c in obj_cols:
-            df[c] = df[c].fillna("").astype(str).str.strip()
 
-    # Anti-Join: all cols as join key
-    merged = act_aligned.merge(
-        prev_aligned.drop_duplicates(),
-        on=cols,
-        how="left",
-        indicator=True
-    )
-    new_mask = merged["_merge"].eq("left_only")
-    new_rows = act_aligned.loc[new_mask].copy()
+def unseen_rows(act_keys: pa.Array, last_keys: pa.Array) -> slice:
+    """
+    return the rows of the actual feed which were not in the last read feed,
+    if the last feed is still an unchanged part of it (else all rows)
+    """
+    n_act, n_last = len(act_keys), len(last_keys)
+    if 0 < n_last <= n_act:
+        # openphish adds new entries on top of feed.csv
+        if act_keys.slice(n_act - n_last).equals(last_keys):
+            return slice(0, n_act - n_last)
+        # or appended at the end
+        if act_keys.slice(0, n_last).equals(last_keys):
+            return slice(n_last, n_act)
+
+    # rows were deleted or reordered
+    return slice(0, n_act)
+
+
+def get_new_entries(
+    prev_keys: set[str], last_keys: pa.Array, act_df: pd.DataFrame, cols: list[str]
+) -> tuple[pd.DataFrame, pa.Array]:
+    """
+    return new entries from act_df which row keys prev_keys not contains, and add their keys to prev_keys.
+    row keys of act_df are returned too, to be passed as last_keys in the next call.
+    """
+    # align cols, strings are already normalized by read_feed_csv_as_dataframe
+    act_aligned = act_df[cols]
+    act_keys = row_keys(act_aligned, cols)
+
+    # rows of the last read feed are all known, so if it is unchanged part of act_df (one vectorized compare)
+    # only the other rows are candidates for new entries
+    candidates = unseen_rows(act_keys, last_keys)
+
+    # Anti-Join: all cols as row key, only probe which candidates are not in the key set
+    # (a pd.Index / MultiIndex.isin would rebuild its hashtable from all known keys on every pull)
+    candidate_keys = act_keys[candidates].to_pylist()
+    is_new = [key not in prev_keys for key in candidate_keys]
+    new_mask = [False] * len(act_keys)
+    new_mask[candidates] = is_new
+    new_rows = act_aligned.loc[new_mask]
+
+    # feed is append-only, so only the keys of new entries have to be added
+    prev_keys.update(key for key, new in zip(candidate_keys, is_new) if new)
 
     # console log
     if new_rows.empty:
@@ -99,32 +250,79 @@ def get_new_entries(prev_df: pd.DataFrame, act_df: pd.DataFrame) -> pd.DataFrame
     else:
         print(f"✅ {len(new_rows)} new entries found.")
 
-    return new_rows
+    return new_rows, act_keys
 
 
 def write_new_entries(new_entries: pd.DataFrame) -> None:
     """
     write new entries to openphish-feed.csv
     """
+    global OUTPUT_COLS
     output = Path("openphish-feed.csv")
 
     # write header only if file not exists or is empty
     write_header = not output.exists() or output.stat().st_size == 0
 
-    if output.exists() and output.stat().st_size > 0:
-        # read header from filled csv and use as sequence
-        cols = pd.read_csv(output, nrows=0).columns.tolist()
-    else:
+    if write_header:
         # write header first time -> use origin order
-        cols = new_entries.columns.tolist()
+        OUTPUT_COLS = new_entries.columns.tolist()
+    elif OUTPUT_COLS is None:
+        # read header from filled csv once and use as sequence
+        OUTPUT_COLS = pd.read_csv(output, nrows=0).columns.tolist()
 
-    # adjust DataFrame to the target order
-    new_entries = new_entries.reindex(columns=cols)
+    # adjust DataFrame to the target order, only if it differs
+    if new_entries.columns.tolist() != OUTPUT_COLS:
+        new_entries = new_entries.reindex(columns=OUTPUT_COLS)
 
     # write output to csv
     new_entries.to_csv(output, mode="a", header=write_header, index=False, encoding="utf-8")
 
 
+def write_new_entries_parquet(new_entries: pd.DataFrame) -> None:
+    """
+    write new entries as row group to the part file of this run in openphish-feed.parquet
+    """
+    global PARQUET_WRITER
+
+    table = pa.Table.from_pandas(new_entries, preserve_index=False)
+    if PARQUET_WRITER is None:
+        # all cols as string, parquet dictionary encodes repetitive cols by itself
+        PARQUET_DIR.mkdir(exist_ok=True)
+        part = PARQUET_DIR.joinpath(f"part-{datetime.now(BERLIN):%Y%m%d-%H%M%S}.parquet")
+        schema = pa.schema([(c, pa.string()) for c in table.column_names])
+        PARQUET_WRITER = pq.ParquetWriter(part, schema, compression="zstd")
+        atexit.register(PARQUET_WRITER.close)
+
+    # adjust table to the schema of the part file
+    schema = PARQUET_WRITER.schema
+    PARQUET_WRITER.write_table(table.select(schema.names).cast(schema))
+
+
+def post_new_entries(payload: list[dict]) -> None:
+    """
+    send new entries to blacklist server
+    """
+    try:
+        # serialize by orjson and compress repetitive urls and times by gzip (fast level)
+        body = gzip.compress(orjson.dumps(payload), compresslevel=1)
+        r = SESSION.post(
+            BLACKLIST_SERVER_URL,
+            data=body,
+            headers={"Content-Type": "application/json", "Content-Encoding": "gzip"},
+            timeout=(3, 10),
+        )
+
+        if not r.status_code == 200:
+            print("ERROR: request blacklist server failed. See server log for details.")
+
+    except requests.RequestException as e:
+        print(e)
+    except Exception:
+        # runs in the background, so print what would have been the traceback of the watcher
+        print("ERROR: sending new entries to blacklist server failed.", file=sys.stderr)
+        traceback.print_exc()
+
+
 def main():
     # create argument parser
     parser = argparse.ArgumentParser(
@@ -133,7 +331,17 @@ def main():
 
     # add arguments
     parser.add_argument(
-        "--repo-url", required=True, help="https://<YOUR_GITHUB_USER>:<TOKEN>@github.com/openphish/academic"
+        "--repo-url", help="https://<YOUR_GITHUB_USER>:<TOKEN>@github.com/openphish/academic"
+    )
+    parser.add_argument(
+        "--feed-url",
+        help="url of the raw feed.csv, which is downloaded only if modified instead of pulling the repository"
+    )
+    parser.add_argument(
+        "--output-format",
+        choices=["csv", "parquet"],
+        default="csv",
+        help="write new entries to openphish-feed.csv or to openphish-feed.parquet (default: csv)"
     )
     parser.add_argument(
         "--pull-interval", type=int, default=300, help="interval between pull requests (default: 300s = 5min)"
@@ -141,87 +349,132 @@ def main():
 
     # parse arguments
     args = parser.parse_args()
+    if not args.repo_url and not args.feed_url:
+        parser.error("one of --repo-url or --feed-url is required")
+
+    # exit normally on SIGTERM too, so the footer of the parquet part file is written
+    if args.output_format == "parquet":
+        signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
 
     # set local folder destination for openphish repo
     local_dir = Path("./openphish-academic-repo")
-
-    # clone repo if not exist
-    try:
-        ensure_repo_cloned(args.repo_url, Path(local_dir).resolve())
-    except Exception as e:
-        print(f"ERROR: cloning repository failed: {e}", file=sys.stderr)
-        sys.exit(2)
+    feed_csv = local_dir.joinpath("feed.csv")
+
+    if args.feed_url:
+        # download feed.csv
+        try:
+            feed = fetch_feed_csv(args.feed_url)
+        except requests.RequestException as e:
+            print(f"ERROR: downloading feed failed: {e}", file=sys.stderr)
+            sys.exit(2)
+    else:
+        # clone repo if not exist
+        try:
+            ensure_repo_cloned(args.repo_url, Path(local_dir).resolve())
+        except Exception as e:
+            print(f"ERROR: cloning repository failed: {e}", file=sys.stderr)
+            sys.exit(2)
+
+        # check if feed.csv exist
+        feed = feed_csv
+        if not feed.exists():
+            print("ERROR: feed file not found: feed.csv")
+            sys.exit(2)
 
     print("\nOpenPhish feed watcher is running. Press Ctrl+C to stop.")
-    print(f"Repo: {args.repo_url}")
-    print(f"Local dir: {local_dir}")
+    if args.feed_url:
+        print(f"Feed: {args.feed_url}")
+    else:
+        print(f"Repo: {args.repo_url}")
+        print(f"Local dir: {local_dir}")
     print(f"Pull interval: {args.pull_interval} seconds\n")
 
-    # check if feed.csv exist
-    feed_csv = Path(local_dir).joinpath("feed.csv")
-    if not feed_csv.exists():
-        print("ERROR: feed file not found: feed.csv")
-        sys.exit(2)
+    # hold row keys of all known phish-feed entries in memory to compare them with the actual feed
+    prev_df: pd.DataFrame = read_feed_csv_as_dataframe(feed)
+    feed_cols = list(prev_df.columns)
+    last_keys: pa.Array = row_keys(prev_df, feed_cols)
+    prev_keys: set[str] = set(last_keys.to_pylist())
 
-    # hold previous phish-feed data frame in memory to compare it with the actual one
-    prev_df: pd.DataFrame = read_feed_csv_as_dataframe(feed_csv)
+    # object id of the last read feed.csv, an unchanged blob after git pull is skipped without parsing it
+    last_sha: Optional[str] = None if args.feed_url else feed_blob_sha(local_dir)
 
     # run watcher
     while True:
+        # pull at a fixed cadence, time of the work below is not added to the interval
+        next_pull = time.monotonic() + args.pull_interval
+
         # pull newest entries
         pull_time = datetime.now(BERLIN).strftime(FMT_OUT)
-        print(f"[{pull_time}]: pull repository for new entries.")
-        git_pull(local_dir)
+        act_df: Optional[pd.DataFrame] = None
 
-        # read feed.csv
-        feed_csv = Path(local_dir).joinpath("feed.csv")
-        if not feed_csv.exists():
-            print("ERROR: feed file not found: feed.csv")
+        if args.feed_url:
+            # download feed.csv, a not modified feed is skipped without parsing it
+            print(f"[{pull_time}]: download feed for new entries.")
+            try:
+                feed = fetch_feed_csv(args.feed_url)
+            except requests.RequestException as e:
+                # retried by the session already, try again at the next pull
+                print(f"ERROR: downloading feed failed: {e}", file=sys.stderr)
+            else:
+                if feed is None:
+                    print("❌ feed not modified.")
+                else:
+                    act_df = read_feed_csv_as_dataframe(feed)
         else:
-            # get update as data frame
-            act_df: pd.DataFrame = read_feed_csv_as_dataframe(feed_csv)
-
-            # get only new entries
-            new_entries = get_new_entries(prev_df, act_df)
-
-            # to check for new data in next iteration
-            prev_df = act_df.copy()
+            print(f"[{pull_time}]: pull repository for new entries.")
+            git_pull(local_dir)
+
+            # read feed.csv
+            sha = feed_blob_sha(local_dir)
+            if sha is not None and sha == last_sha:
+                print("❌ feed not modified.")
+            else:
+                # get update as data frame
+                try:
+                    act_df = read_feed_csv_as_dataframe(feed_csv)
+                    last_sha = sha
+                except FileNotFoundError:
+                    print("ERROR: feed file not found: feed.csv")
+
+        if act_df is not None:
+            # get only new entries, their keys are kept to check for new data in next iteration
+            new_entries, last_keys = get_new_entries(prev_keys, last_keys, act_df, feed_cols)
 
             if not new_entries.empty:
                 # write new entries in csv-file
                 print("✏️ writing new entries...")
-                write_new_entries(new_entries)
+                if args.output_format == "parquet":
+                    write_new_entries_parquet(new_entries)
+                else:
+                    write_new_entries(new_entries)
 
                 # send url, discover_time and pulled-time of new entries to blacklist-server
                 cols = ["url", "discover_time"]
                 missing_cols = [c for c in cols if c not in new_entries.columns]
                 if not missing_cols:
-                    df = new_entries.loc[:, cols].copy()
-                    df['discover_time'] = df['discover_time'].map(utc_to_berlin)
-                    df['pulled_time'] = pull_time
-
-                    payload = df.to_dict(orient="records")
-
-                    try:
-                        print(f"✉️ Send {len(payload)} new entries to blacklist server.")
-                        r = requests.post(BLACKLIST_SERVER_URL, json=payload, timeout=10)
-
-                        if not r.status_code == 200:
-                            print("ERROR: request blacklist server failed. See server log for details.")
-
-                    except requests.RequestException as e:
-                        print(e)
+                    # build records from the arrow arrays of url and converted discover_time,
+                    # DataFrame.to_dict boxes every cell on its own
+                    urls = pa.array(new_entries["url"]).to_pylist()
+                    discover_times = pa.array(utc_series_to_berlin(new_entries["discover_time"])).to_pylist()
+                    payload = [
+                        {"url": url, "discover_time": discover_time, "pulled_time": pull_time}
+                        for url, discover_time in zip(urls, discover_times)
+                    ]
+
+                    print(f"✉️ Send {len(payload)} new entries to blacklist server.")
+                    POST_EXECUTOR.submit(post_new_entries, payload)
 
                 else:
                     print(f"ERROR: {len(new_entries)} not send to blacklist server because cols are missing")
 
-            # sleep
-            try:
-                print(f"💤 finished! Sleeping for {args.pull_interval} seconds.\n")
-                time.sleep(args.pull_interval)
-            except KeyboardInterrupt:
-                print("\nStopped by user during sleep. Bye!")
-                break
+        # sleep
+        try:
+            sleep_time = max(0.0, next_pull - time.monotonic())
+            print(f"💤 finished! Sleeping for {sleep_time:.0f} seconds.\n")
+            time.sleep(sleep_time)
+        except KeyboardInterrupt:
+            print("\nStopped by user during sleep. Bye!")
+            break
 
 
 if __name__ == "__main__":
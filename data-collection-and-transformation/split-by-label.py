@@ -2,6 +2,11 @@ from pathlib import Path
 import argparse
 import sys
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+# bytes of the input csv parsed and split at once
+BLOCK_SIZE = 16 << 20
 
 
 def split_by_label(input_csv: Path, out0: Path, out1: Path) -> None:
@@ -9,48 +14,69 @@ def split_by_label(input_csv: Path, out0: Path, out1: Path) -> None:
     split dataset by label
     """
 
-    # read in csv as string
-    df = pd.read_csv(input_csv, dtype=str)
-
-    # normalize column names and resolve case-insensitively
-    df.columns = [c.strip() for c in df.columns]
-    colmap = {c.lower(): c for c in df.columns}
+    # normalize column names of header and resolve case-insensitively
+    header = pd.read_csv(input_csv, nrows=0).columns
+    colmap = {c.strip().lower(): c for c in header}
 
     if "url" not in colmap or "label" not in colmap:
         raise ValueError(
             f"CSV must contain columns 'url' and 'label'."
-            f"Found: {list(df.columns)}"
+            f"Found: {[c.strip() for c in header]}"
         )
 
     url_col = colmap["url"]
     label_col = colmap["label"]
 
-    # clean values
-    df = df[[url_col, label_col]].copy()
-    df[url_col] = df[url_col].astype(str).str.strip()
-    df = df[df[url_col] != ""]
-
-    # parse label to int ('phishing' --> 0, 'legitimate' --> 1)
-    df[label_col] = df[label_col].replace({'0': 0, '1': 1})
-    df[label_col] = pd.to_numeric(df[label_col], errors="coerce")
-    df = df[df[label_col].isin([0, 1])].copy()
-    df[label_col] = df[label_col].astype(int)
-
-    # split dataset
-    df0 = df[df[label_col] == 0][[url_col, label_col]].copy()
-    df1 = df[df[label_col] == 1][[url_col, label_col]].copy()
-    df0.columns = ["url", "label"]
-    df1.columns = ["url", "label"]
+    # stream only url and label as string by pyarrow's csv reader, one block at a time
+    reader = pacsv.open_csv(
+        input_csv,
+        read_options=pacsv.ReadOptions(block_size=BLOCK_SIZE),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(
+            include_columns=[url_col, label_col],
+            column_types={url_col: pa.string(), label_col: pa.string()},
+            strings_can_be_null=True,
+        ),
+    )
 
-    # write splittet data to csv files
+    # write header only if output file not exists or is empty
     write_header_out0 = (not out0.exists() or out0.stat().st_size == 0)
     write_header_out1 = (not out1.exists() or out1.stat().st_size == 0)
-    df0.to_csv(out0, mode='a', header=write_header_out0, index=False, encoding='utf-8')
-    df1.to_csv(out1, mode='a', header=write_header_out1, index=False, encoding='utf-8')
+
+    count0 = 0
+    count1 = 0
+    with out0.open("a", encoding="utf-8", newline="") as f0, out1.open("a", encoding="utf-8", newline="") as f1:
+        if write_header_out0:
+            pd.DataFrame(columns=["url", "label"]).to_csv(f0, index=False)
+        if write_header_out1:
+            pd.DataFrame(columns=["url", "label"]).to_csv(f1, index=False)
+
+        for batch in reader:
+            # batch holds only url and label, so it is renamed in place of copying
+            df = batch.to_pandas().rename(columns={url_col: "url", label_col: "label"})
+
+            # clean values
+            df["url"] = df["url"].astype(str).str.strip()
+            df = df[df["url"] != ""]
+
+            # parse label to int ('phishing' --> 0, 'legitimate' --> 1)
+            label = pd.to_numeric(df["label"].replace({'0': 0, '1': 1}), errors="coerce")
+            keep = label.isin([0, 1])
+            df = df.loc[keep, ["url"]].assign(label=label[keep].astype(int))
+
+            # split block
+            df0 = df.loc[df["label"] == 0]
+            df1 = df.loc[df["label"] == 1]
+
+            # append splittet block to csv files
+            df0.to_csv(f0, header=False, index=False)
+            df1.to_csv(f1, header=False, index=False)
+            count0 += len(df0)
+            count1 += len(df1)
 
     print(f"Done!")
-    print(f"  Label 0: {len(df0):>6} URLs -> {out0}")
-    print(f"  Label 1: {len(df1):>6} URLs -> {out1}")
+    print(f"  Label 0: {count0:>6} URLs -> {out0}")
+    print(f"  Label 1: {count1:>6} URLs -> {out1}")
 
 
 def parse_args() -> argparse.Namespace:
@@ -11,23 +11,16 @@ black_df = pd.read_csv("blacklist-evaluation-results.csv", dtype={"url": str})
 for df in (eval_df, black_df):
     df["url"] = df["url"].astype(str).str.strip()
 
-# Schnittmenge der URLs bestimmen
-urls_eval  = set(eval_df["url"])
-urls_black = set(black_df["url"])
-common_urls = urls_eval & urls_black
-
-# Keep only shared URLs and remove duplicates for each URL.
-eval_clean = (
-    eval_df[eval_df["url"].isin(common_urls)]
-    .drop_duplicates(subset="url")
-    .reset_index(drop=True)
-)
-
-black_clean = (
-    black_df[black_df["url"].isin(common_urls)]
-    .drop_duplicates(subset="url")
-    .reset_index(drop=True)
-)
+# remove duplicates for each URL
+eval_df = eval_df.drop_duplicates(subset="url", ignore_index=True)
+black_df = black_df.drop_duplicates(subset="url", ignore_index=True)
+
+# Schnittmenge der URLs bestimmen (one hash join on the url keys)
+common_urls = eval_df[["url"]].merge(black_df[["url"]], on="url", how="inner", validate="one_to_one")
+
+# Keep only shared URLs, an inner merge keeps the order of the left rows
+eval_clean = eval_df.merge(common_urls, on="url", how="inner", validate="one_to_one")
+black_clean = black_df.merge(common_urls, on="url", how="inner", validate="one_to_one")
 
 eval_clean.to_csv("evaluation-features.csv", index=False)
 black_clean.to_csv("blacklist-evaluation-results.csv", index=False)
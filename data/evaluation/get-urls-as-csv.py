@@ -1,7 +1,20 @@
-import pandas as pd
+import csv
 
-eval_df = pd.read_csv("evaluation-features.csv", dtype={"url": str})
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
 
-only_urls = eval_df["url"].astype(str).str.strip()
+# parse only the url column by pyarrow's csv reader
+table = pacsv.read_csv(
+    "evaluation-features.csv",
+    parse_options=pacsv.ParseOptions(newlines_in_values=True),
+    convert_options=pacsv.ConvertOptions(include_columns=["url"], column_types={"url": pa.string()}),
+)
 
-only_urls.to_csv("chatgpt-evaluation-input.csv", index=False)
\ No newline at end of file
+only_urls = pc.utf8_trim_whitespace(table.column("url"))
+
+# write by csv module, which quotes only urls that need it (pyarrow's writer quotes every string)
+with open("chatgpt-evaluation-input.csv", "w", newline="", encoding="utf-8") as f:
+    writer = csv.writer(f, lineterminator="\n")
+    writer.writerow(["url"])
+    writer.writerows([url] for url in only_urls.to_pylist())